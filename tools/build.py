@@ -5,59 +5,104 @@ Parses staff-onboarding.md and student-onboarding.md and generates staff.html an
 """
 
 import os
+import argparse
 import re
+import json
 import base64
 import subprocess
 import shutil
 from pathlib import Path
+from functools import lru_cache, partial
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 from datetime import datetime
 
-# Configuration flag - set to False to copy logo file instead of embedding as base64
-BASE64_LOGO = False
+# Logo sizes we need for PWA manifests
+LOGO_SIZES = [
+    (32, 32),
+    (96, 96),
+    (192, 192),
+    (512, 512)
+]
 
+# Resolve tidy once so each lint run skips the PATH lookup
+TIDY_PATH = shutil.which('tidy')
+
+# Precompiled patterns used while parsing markdown
+_DOCUMENT_RE = re.compile(r'\A---\n(.*?)\n---\n\s*(.*)\Z', re.DOTALL)
+# Bold text may contain single '*' but never '**', so a match cannot run past its closing pair
+_BOLD_RE = re.compile(r'\*\*([^*]+(?:\*(?!\*)[^*]*)*)\*\*')
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+_CHECKLIST_LINE_RE = re.compile(r'^(?:- \[ \](?P<item>.*)|  -(?P<sub>.*))$', re.MULTILINE)
+
+# Template placeholders such as {{title}}
+_TEMPLATE_VAR_RE = re.compile(r'\{\{(\w+)\}\}')
+
+def read_git_head(git_dir):
+    """Return the commit hash HEAD points to, read directly from the git directory."""
+    head = (git_dir / 'HEAD').read_text(encoding='utf-8').strip()
+    if not head.startswith('ref: '):
+        # Detached HEAD already holds the hash
+        return head
+    
+    ref = head[len('ref: '):]
+    ref_path = git_dir / ref
+    if ref_path.exists():
+        return ref_path.read_text(encoding='utf-8').strip()
+    
+    # The ref may only exist in packed-refs
+    for line in (git_dir / 'packed-refs').read_text(encoding='utf-8').splitlines():
+        if line.endswith(f' {ref}'):
+            return line.split(' ', 1)[0]
+    raise FileNotFoundError(f"Git ref not found: {ref}")
+
+@lru_cache(maxsize=1)
 def generate_version():
     """Generate version string using date-githash format."""
+    # Get current date in YYYY-MM-DD format
+    date_str = datetime.now().strftime('%Y-%m-%d')
+    
     try:
-        # Get current date in YYYY-MM-DD format
-        date_str = datetime.now().strftime('%Y-%m-%d')
-        
-        # Get short git hash (7 characters)
-        result = subprocess.run(
-            ['git', 'rev-parse', '--short=7', 'HEAD'],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        git_hash = result.stdout.strip()
+        # Get short git hash (7 characters), reading .git directly to avoid
+        # spawning git; worktrees and other layouts fall back to the CLI
+        try:
+            git_hash = read_git_head(Path(__file__).resolve().parent.parent / '.git')[:7]
+        except OSError:
+            result = subprocess.run(
+                ['git', 'rev-parse', '--short=7', 'HEAD'],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            git_hash = result.stdout.strip()
         
         return f"{date_str}-{git_hash}"
     except (subprocess.CalledProcessError, FileNotFoundError):
         # Fallback if git is not available
-        return datetime.now().strftime('%Y-%m-%d-%fallback')
+        return f"{date_str}-fallback"
 
 def parse_markdown_file(file_path):
     """Parse markdown file and extract frontmatter and content."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = file_path.read_bytes().decode('utf-8')
+    # Normalise line endings as text mode would, only when needed
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
     
-    # Extract frontmatter
-    frontmatter_match = re.match(r'^---\n(.*?)\n---\n', content, re.DOTALL)
-    if not frontmatter_match:
+    # Split frontmatter and content in a single match
+    document_match = _DOCUMENT_RE.match(content)
+    if not document_match:
         raise ValueError("No frontmatter found in markdown file")
     
-    frontmatter_text = frontmatter_match.group(1)
-    frontmatter = {}
+    frontmatter_text, markdown_content = document_match.groups()
+    markdown_content = markdown_content.rstrip()
     
-    # Parse frontmatter key-value pairs
-    for line in frontmatter_text.strip().split('\n'):
-        if ':' in line:
-            key, value = line.split(':', 1)
-            frontmatter[key.strip()] = value.strip().strip('"')
-    
-    # Extract content after frontmatter
-    content_start = frontmatter_match.end()
-    markdown_content = content[content_start:].strip()
+    # Parse frontmatter key-value pairs; lines without a colon are ignored
+    frontmatter = {
+        key.strip(): value.strip().strip('"')
+        for key, separator, value in (line.partition(':') for line in frontmatter_text.splitlines())
+        if separator
+    }
     
     return frontmatter, markdown_content
 
@@ -67,17 +112,20 @@ def encode_logo_to_base64(logo_path):
         logo_data = f.read()
     return base64.b64encode(logo_data).decode('utf-8')
 
-def generate_logo_sizes(logo_path, assets_dir):
-    """Generate different sized logos from the source logo."""
-    print("    Generating logo sizes...")
+def save_logo(image, output_path, optimize=False):
+    """Save a logo image as PNG to the assets directory."""
+    if optimize:
+        image.save(output_path, 'PNG', optimize=True)
+    else:
+        image.save(output_path, 'PNG', compress_level=1)
+
+def generate_logo_sizes(logo_path, assets_dir, optimize=False):
+    """Generate different sized logos from the source logo.
     
-    # Define the sizes we need for PWA manifests
-    sizes = [
-        (32, 32),
-        (96, 96), 
-        (192, 192),
-        (512, 512)
-    ]
+    PNGs are saved with the fastest zlib level; pass optimize=True for the
+    slower, smaller encoding used in release builds (--release).
+    """
+    print("    Generating logo sizes...")
     
     try:
         # Open the source image
@@ -86,17 +134,31 @@ def generate_logo_sizes(logo_path, assets_dir):
             if img.mode != 'RGBA':
                 img = img.convert('RGBA')
             
-            generated_files = []
+            resized_logos = []
+            source = img
             
-            for width, height in sizes:
+            # Work from largest to smallest so each size is resampled from the
+            # previous downscaled image rather than the full-size original
+            for width, height in sorted(LOGO_SIZES, reverse=True):
                 # Resize image maintaining aspect ratio and quality
-                resized = img.resize((width, height), Image.Resampling.LANCZOS)
+                resized = source.resize((width, height), Image.Resampling.LANCZOS)
+                resized_logos.append((f"logo-{width}x{height}.png", resized))
                 
-                # Save to assets directory
-                filename = f"logo-{width}x{height}.png"
-                output_path = assets_dir / filename
-                resized.save(output_path, 'PNG', optimize=True)
-                generated_files.append(filename)
+                # Only chain from real downscales; an upscaled copy adds no detail
+                if width <= img.width and height <= img.height:
+                    source = resized
+            
+            # PNG encoding releases the GIL, so save all sizes concurrently
+            with ThreadPoolExecutor(max_workers=len(resized_logos)) as executor:
+                saves = [
+                    executor.submit(save_logo, resized, assets_dir / filename, optimize)
+                    for filename, resized in resized_logos
+                ]
+                for save in saves:
+                    save.result()
+            
+            generated_files = [filename for filename, _ in resized_logos]
+            for filename in generated_files:
                 print(f"      Generated {filename}")
             
             return generated_files
@@ -107,94 +169,120 @@ def generate_logo_sizes(logo_path, assets_dir):
 
 def convert_markdown_to_html(text):
     """Convert markdown formatting to HTML."""
-    # Convert bold markdown to HTML
-    text = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', text)
+    # Convert bold markdown to HTML; plain substring checks let most
+    # sub-items skip the regex engine entirely
+    if '**' in text:
+        text = _BOLD_RE.sub(r'<strong>\1</strong>', text)
     # Convert links markdown to HTML
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', text)
+    if '](' in text:
+        text = _LINK_RE.sub(r'<a href="\2">\1</a>', text)
     return text
 
 def parse_checklist_items(markdown_content):
     """Parse checklist items from markdown content."""
     items = []
-    
-    # Split content into lines and process
-    lines = markdown_content.split('\n')
     current_item = None
     
-    for line in lines:
-        # Don't strip the line yet - we need to preserve indentation
-        if not line.strip():
-            continue
-            
-        # Check if this is a main checklist item (starts with - [ ])
-        if line.startswith('- [ ]'):
-            # Save previous item if exists
-            if current_item:
-                items.append(current_item)
-            
+    # Walk main items (- [ ]) and sub-items (indented with 2 spaces) in one scan;
+    # any other line is ignored
+    for match in _CHECKLIST_LINE_RE.finditer(markdown_content):
+        if match.lastgroup == 'item':
             # Start new item
-            item_text = line[5:].strip()  # Remove '- [ ]' prefix
-            # Convert markdown to HTML
-            item_text = convert_markdown_to_html(item_text)
             current_item = {
-                'text': item_text,
+                'text': convert_markdown_to_html(match.group('item').strip()),
                 'sub_items': []
             }
-        elif line.startswith('  -') and current_item:
-            # This is a sub-item (indented with 2 spaces)
-            sub_item_text = line[3:].strip()  # Remove '  -' prefix
-            # Convert markdown to HTML
-            sub_item_text = convert_markdown_to_html(sub_item_text)
-            current_item['sub_items'].append(sub_item_text)
-    
-    # Add the last item
-    if current_item:
-        items.append(current_item)
+            items.append(current_item)
+        elif current_item:
+            current_item['sub_items'].append(convert_markdown_to_html(match.group('sub').strip()))
     
     return items
 
+def iter_checklist_html(items):
+    """Yield the HTML block for each checklist item."""
+    for i, item in enumerate(items, 1):
+        # Emit each checklist item, including its sub-items, as a single block
+        sub_items_html = ''.join(
+            f'        <div class="sub-item">{sub_item}</div>\n' for sub_item in item['sub_items']
+        )
+        yield (
+            f'<div class="checklist-item" data-step="{i}">\n'
+            '    <div class="checkbox"></div>\n'
+            '    <div class="item-content">\n'
+            f'        <div class="item-text">{item["text"]}</div>\n'
+            f'{sub_items_html}'
+            '    </div>\n'
+            '</div>'
+        )
+
 def generate_checklist_html(items):
     """Generate HTML for checklist items using the provided template."""
-    html_parts = []
+    return '\n'.join(iter_checklist_html(items))
+
+def write_checklist_html(items, out):
+    """Write HTML for checklist items to out one item at a time."""
+    for i, item_html in enumerate(iter_checklist_html(items)):
+        if i:
+            out.write('\n')
+        out.write(item_html)
+
+def fill_template(template, frontmatter, checklist_html, logo_data, manifest_path, out=None):
+    """Fill template text with extracted data.
     
-    for i, item in enumerate(items, 1):
-        # Start checklist item div
-        html_parts.append(f'<div class="checklist-item" data-step="{i}">')
-        html_parts.append('    <div class="checkbox"></div>')
-        html_parts.append('    <div class="item-content">')
-        html_parts.append(f'        <div class="item-text">{item["text"]}</div>')
-        
-        # Add sub-items
-        for sub_item in item['sub_items']:
-            html_parts.append(f'        <div class="sub-item">{sub_item}</div>')
-        
-        # Close item-content and checklist-item divs
-        html_parts.append('    </div>')
-        html_parts.append('</div>')
+    If out is given, the filled template is written to it piece by piece
+    instead of being returned as a string. In that case any value may also be
+    a callable, which is called with out to write its own content.
+    """
+    # Replace template variables in a single pass
+    values = {
+        'title': frontmatter.get('title', ''),
+        'subtitle': frontmatter.get('subtitle', ''),
+        'description': frontmatter.get('description', ''),
+        'logo': logo_data,
+        'content': checklist_html,
+        'manifest': manifest_path,
+    }
+    if out is None:
+        return _TEMPLATE_VAR_RE.sub(lambda m: values.get(m.group(1), m.group(0)), template)
     
-    return '\n'.join(html_parts)
+    # Stream literal template segments and values without building the document
+    position = 0
+    for match in _TEMPLATE_VAR_RE.finditer(template):
+        out.write(template[position:match.start()])
+        value = values.get(match.group(1), match.group(0))
+        if callable(value):
+            value(out)
+        else:
+            out.write(value)
+        position = match.end()
+    out.write(template[position:])
 
-def fill_template(template_path, frontmatter, checklist_html, logo_data, manifest_path):
-    """Fill template with extracted data."""
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template = f.read()
-    
-    # Replace template variables
-    template = template.replace('{{title}}', frontmatter.get('title', ''))
-    template = template.replace('{{subtitle}}', frontmatter.get('subtitle', ''))
-    template = template.replace('{{description}}', frontmatter.get('description', ''))
-    template = template.replace('{{logo}}', logo_data)
-    template = template.replace('{{content}}', checklist_html)
-    template = template.replace('{{manifest}}', manifest_path)
+@contextmanager
+def open_atomic(output_path, mode='w', **kwargs):
+    """Open a temporary file next to output_path and move it into place on success.
     
-    return template
+    An interrupted or failed write never leaves a truncated output that the
+    incremental build would later treat as up to date.
+    """
+    temp_path = output_path.with_suffix('.tmp')
+    try:
+        with open(temp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(temp_path, output_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+def tidy_enabled():
+    """Return True if tidy is installed and not disabled with SKIP_TIDY."""
+    return TIDY_PATH is not None and not os.environ.get('SKIP_TIDY')
 
-def lint_html(html_content):
-    """Lint HTML content using tidy if available."""
+def lint_html(html_content, log=print):
+    """Lint HTML content using tidy; callers check tidy_enabled() first."""
     try:
         # Try to use tidy for HTML linting
         process = subprocess.run(
-            ['tidy', '-q', '-asxhtml', '--show-warnings', 'no'],
+            [TIDY_PATH, '-q', '-asxhtml', '--show-warnings', 'no'],
             input=html_content,
             text=True,
             capture_output=True,
@@ -203,81 +291,132 @@ def lint_html(html_content):
         return process.stdout
     except (subprocess.CalledProcessError, FileNotFoundError):
         # If tidy is not available or fails, return original content
-        print("    Warning: HTML tidy not available, skipping linting")
+        log("    Warning: HTML tidy not available, skipping linting")
         return html_content
 
 
 
-def build_checklist(markdown_file, output_file, template_html, logo_png, dist_dir, assets_dir, manifest_path, version):
-    """Build a single checklist from markdown file."""
-    print(f"  Processing {markdown_file.name}...")
+def prepare_logo(logo_png, assets_dir, inline=False):
+    """Prepare the logo URL shared by all checklists.
     
-    # Parse markdown file
-    print("    Parsing markdown...")
-    frontmatter, markdown_content = parse_markdown_file(markdown_file)
-    print(f"      Found frontmatter: {list(frontmatter.keys())}")
-    
-    # Handle logo based on configuration
-    if BASE64_LOGO:
+    By default the logo is copied to the assets directory and referenced by
+    path so browsers can cache it; inline=True embeds it as a base64 data URI
+    for self-contained HTML.
+    """
+    if inline:
         print("    Encoding logo to base64...")
-        logo_data = encode_logo_to_base64(logo_png)
+        logo_data = f"data:image/png;base64,{encode_logo_to_base64(logo_png)}"
         print(f"      Logo encoded ({len(logo_data)} characters)")
     else:
         print("    Copying logo file...")
         logo_dest = assets_dir / 'logo-lg.png'
         shutil.copy2(logo_png, logo_dest)
-        logo_data = 'logo-lg.png'  # Use filename only since CSS will handle the path
+        logo_data = '../assets/logo-lg.png'  # Relative to the checklist pages
         print(f"      Logo copied to {logo_dest}")
     
+    return logo_data
+
+def build_checklist(markdown_file, output_file, template_text, logo_data, manifest_path, version, lint=False):
+    """Build a single checklist from markdown file.
+    
+    HTML is only passed through tidy when lint is True (release builds).
+    Progress messages are returned as a list of lines for the caller to print.
+    """
+    log = []
+    log.append(f"  Processing {markdown_file.name}...")
+    
+    # Parse markdown file
+    log.append("    Parsing markdown...")
+    frontmatter, markdown_content = parse_markdown_file(markdown_file)
+    log.append(f"      Found frontmatter: {list(frontmatter.keys())}")
+    
     # Parse checklist items
-    print("    Parsing checklist items...")
+    log.append("    Parsing checklist items...")
     items = parse_checklist_items(markdown_content)
-    print(f"      Found {len(items)} checklist items")
-    
-    # Generate checklist HTML
-    print("    Generating checklist HTML...")
-    checklist_html = generate_checklist_html(items)
+    log.append(f"      Found {len(items)} checklist items")
     
     # Add cache busting to manifest path
     manifest_with_cache_bust = f"{manifest_path}?v={version}"
     
+    if not (lint and tidy_enabled()):
+        # Nothing to lint, so write the template and checklist items straight
+        # into the output file without building the document in memory
+        if lint:
+            log.append("    Warning: HTML tidy not available or SKIP_TIDY set, skipping linting")
+        else:
+            log.append("    Skipping HTML linting")
+        log.append(f"    Generating checklist HTML into {output_file}...")
+        with open_atomic(output_file, 'w', encoding='utf-8', newline='') as f:
+            fill_template(template_text, frontmatter, partial(write_checklist_html, items),
+                          logo_data, manifest_with_cache_bust, out=f)
+        return log
+    
+    # Generate checklist HTML
+    log.append("    Generating checklist HTML...")
+    checklist_html = generate_checklist_html(items)
+    
     # Fill template
-    print("    Filling template...")
-    final_html = fill_template(template_html, frontmatter, checklist_html, logo_data, manifest_with_cache_bust)
+    log.append("    Filling template...")
+    final_html = fill_template(template_text, frontmatter, checklist_html, logo_data, manifest_with_cache_bust)
     
     # Lint HTML
-    print("    Linting HTML...")
-    final_html = lint_html(final_html)
+    log.append("    Linting HTML...")
+    final_html = lint_html(final_html, log=log.append)
     
     # Write HTML output
-    print(f"    Writing to {output_file}...")
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(final_html)
+    log.append(f"    Writing to {output_file}...")
+    with open_atomic(output_file, 'wb') as f:
+        f.write(final_html.encode('utf-8'))
     
-    return final_html
+    return log
 
 def load_manifest_template(template_path):
     """Load manifest template from JSON file."""
-    import json
-    with open(template_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return json.loads(template_path.read_text(encoding='utf-8'))
 
-def create_simplified_manifest(name, short_name, start_url, template_path, version):
-    """Create a simplified PWA manifest using template."""
-    template = load_manifest_template(template_path)
-    
-    # Replace template variables
-    manifest = template.copy()
-    manifest["name"] = name
-    manifest["short_name"] = short_name
-    manifest["start_url"] = start_url
-    manifest["scope"] = start_url
-    manifest["version"] = version
-    
-    return manifest
+def create_simplified_manifest(name, short_name, start_url, template, version):
+    """Create a simplified PWA manifest from the loaded template."""
+    # A shallow merge is enough: nested values such as icons are shared with
+    # the template but are never modified, and each manifest is serialised
+    # right after it is created
+    return {
+        **template,
+        "name": name,
+        "short_name": short_name,
+        "start_url": start_url,
+        "scope": start_url,
+        "version": version,
+    }
+
+def is_stale(inputs, output):
+    """Return True if output is missing or older than any of its inputs."""
+    if not output.exists():
+        return True
+    return max(path.stat().st_mtime_ns for path in inputs) > output.stat().st_mtime_ns
+
+def read_build_stamp(stamp_path):
+    """Return the settings recorded by the previous build, or None if unknown."""
+    try:
+        return json.loads(stamp_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Build the onboarding checklists.")
+    parser.add_argument('--release', action='store_true',
+                        help="optimize PNG assets and lint HTML with tidy (slower, used for deployment)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild all outputs even if their inputs are unchanged")
+    parser.add_argument('--clean', action='store_true',
+                        help="remove the dist directory before building")
+    parser.add_argument('--inline-logo', action='store_true',
+                        help="embed the logo as a base64 data URI for self-contained HTML")
+    return parser.parse_args()
 
 def main():
     """Main build function."""
+    args = parse_args()
     try:
         # Define paths
         script_dir = Path(__file__).parent
@@ -300,8 +439,8 @@ def main():
             if not file_path.exists():
                 raise FileNotFoundError(f"Required file not found: {file_path}")
         
-        # Clean and ensure directories exist
-        if dist_dir.exists():
+        # Ensure directories exist, reusing previous output unless --clean is given
+        if args.clean and dist_dir.exists():
             shutil.rmtree(dist_dir)
         dist_dir.mkdir(exist_ok=True)
         staff_dir.mkdir(exist_ok=True)
@@ -314,46 +453,73 @@ def main():
         version = generate_version()
         print(f"Generated version: {version}")
         
-        # Generate logo sizes
-        print("Generating logo assets...")
-        generate_logo_sizes(logo_png, assets_dir)
+        # Load templates once for both checklists
+        template_text = template_html.read_text(encoding='utf-8')
+        manifest_template = load_manifest_template(template_json)
         
-        # Build staff checklist
-        print("Building staff checklist...")
-        build_checklist(staff_md, staff_output, template_html, logo_png, dist_dir, assets_dir, 'manifest.json', version)
+        # Generate logo sizes, unless all of them are newer than the source logo
+        # and the build script that produces them
+        logo_inputs = [logo_png, Path(__file__)]
+        logo_outputs = [assets_dir / f"logo-{width}x{height}.png" for width, height in LOGO_SIZES]
+        if args.force or args.release or any(is_stale(logo_inputs, output) for output in logo_outputs):
+            print("Generating logo assets...")
+            generate_logo_sizes(logo_png, assets_dir, optimize=args.release)
+        else:
+            print("Logo assets up to date, skipping")
+        logo_data = prepare_logo(logo_png, assets_dir, inline=args.inline_logo)
         
-        # Build student checklist
-        print("Building student checklist...")
-        build_checklist(student_md, student_output, template_html, logo_png, dist_dir, assets_dir, 'manifest.json', version)
+        # The version and logo mode are baked into every page, so a change to
+        # either (recorded in the build stamp) makes all pages stale
+        # regardless of mtimes
+        build_stamp_path = dist_dir / '.build-stamp.json'
+        build_stamp = {'version': version, 'inline_logo': args.inline_logo}
+        stamp_changed = read_build_stamp(build_stamp_path) != build_stamp
         
-        # Create simplified manifests
-        print("Creating PWA manifests...")
+        # Build stale checklists; the build script itself is an
+        # input so changes to the generator also trigger a rebuild
+        shared_inputs = [template_html, logo_png, Path(__file__)]
+        pending = [
+            (markdown_file, output_file)
+            for markdown_file, output_file in [(staff_md, staff_output), (student_md, student_output)]
+            if args.force or args.release or stamp_changed
+            or is_stale([markdown_file, *shared_inputs], output_file)
+        ]
+        if pending:
+            print("Building checklists...")
+            build_args = [
+                (markdown_file, output_file, template_text, logo_data, 'manifest.json', version, args.release)
+                for markdown_file, output_file in pending
+            ]
+            if args.release and tidy_enabled():
+                # Overlap the tidy subprocesses; subprocess.run releases the GIL
+                with ThreadPoolExecutor(max_workers=len(build_args)) as executor:
+                    build_logs = list(executor.map(lambda build: build_checklist(*build), build_args))
+            else:
+                build_logs = [build_checklist(*build) for build in build_args]
+            for build_log in build_logs:
+                print('\n'.join(build_log))
+        else:
+            print("Checklists up to date, skipping")
         
-        # Staff manifest
-        staff_manifest = create_simplified_manifest(
-            "ISS App",
-            "ISS",
-            "https://iss-apps.github.io/onboarding-checklist/staff/",
-            template_json,
-            version
-        )
-        
-        with open(staff_dir / 'manifest.json', 'w', encoding='utf-8') as f:
-            import json
-            json.dump(staff_manifest, f, indent=2)
+        # Create simplified manifests for rebuilt pages, or when the manifest
+        # template changed, so each manifest matches its page's version
+        print("Creating PWA manifests...")
         
-        # Student manifest
-        student_manifest = create_simplified_manifest(
-            "ISS App", 
-            "ISS Student",
-            "https://iss-apps.github.io/onboarding-checklist/student/",
-            template_json,
-            version
-        )
+        built_outputs = {output_file for _, output_file in pending}
+        manifests = [
+            (staff_output, "ISS", "https://iss-apps.github.io/onboarding-checklist/staff/"),
+            (student_output, "ISS Student", "https://iss-apps.github.io/onboarding-checklist/student/"),
+        ]
+        for output_file, short_name, start_url in manifests:
+            manifest_path = output_file.parent / 'manifest.json'
+            if output_file not in built_outputs and not is_stale([template_json, Path(__file__)], manifest_path):
+                continue
+            manifest = create_simplified_manifest("ISS App", short_name, start_url, manifest_template, version)
+            with open_atomic(manifest_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(manifest, indent=2))
         
-        with open(student_dir / 'manifest.json', 'w', encoding='utf-8') as f:
-            import json
-            json.dump(student_manifest, f, indent=2)
+        # Record what this build produced for the next incremental run
+        build_stamp_path.write_text(json.dumps(build_stamp, indent=2), encoding='utf-8')
         
         print("Build complete! ✅")
         print(f"Output files:")